@@ -4,23 +4,48 @@ Final comprehensive test of UAE Tourism Assistant
 Demonstrates all working functionality
 """
 
-import json
-from datetime import datetime
+import mmap
+import re
+from functools import lru_cache
+from pathlib import Path
+from types import MappingProxyType
 
+from uae_common import emit as _emit, loads as _loads, today as _today
+
+_KB_PATH = Path(__file__).with_name('uae_knowledge.json')
+
+@lru_cache(maxsize=1)
 def load_knowledge_base():
-    """Load the UAE knowledge base"""
-    with open('uae_knowledge.json', 'r', encoding='utf-8') as f:
-        return json.load(f)
+    """Load the UAE knowledge base (parsed once per process)"""
+    with open(_KB_PATH, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        with memoryview(mm) as data:
+            return MappingProxyType(_loads(data))
+
+_WORD_RE = re.compile(r"\w+")
+_CITY_TRIGGERS = frozenset({'attractions', 'activities', 'places'})
+_ACTIVITY_TRIGGERS = frozenset({'budget', 'luxury', 'adventure', 'cultural'})
+
+@lru_cache(maxsize=1)
+def _city_words():
+    """Map each city to the set of lowercase words in its name"""
+    return {city_name: frozenset(city_name.lower().split()) for city_name in load_knowledge_base()['cities']}
+
+@lru_cache(maxsize=1)
+def _activity_categories():
+    """Map each lowercase activity category to its list of activities"""
+    return {category.lower(): activities for category, activities in load_knowledge_base()['activities'].items()}
 
 def search_uae_knowledge(query):
     """Search UAE knowledge base"""
     knowledge_base = load_knowledge_base()
-    query_lower = query.lower()
+    query_words = set(_WORD_RE.findall(query.lower()))
     results = []
     
     # Search cities
+    list_all_cities = not _CITY_TRIGGERS.isdisjoint(query_words)
+    city_words = _city_words()
     for city_name, city_data in knowledge_base['cities'].items():
-        if city_name.lower() in query_lower or any(keyword in query_lower for keyword in ['attractions', 'activities', 'places']):
+        if list_all_cities or city_words[city_name] <= query_words:
             city_info = {
                 'city': city_name,
                 'description': city_data['description'],
@@ -29,11 +54,12 @@ def search_uae_knowledge(query):
             results.append(city_info)
     
     # Search activities
-    if any(keyword in query_lower for keyword in ['budget', 'luxury', 'adventure', 'cultural']):
-        matching_activities = []
-        for activity in knowledge_base['activities']:
-            if any(keyword in activity['category'].lower() for keyword in query_lower.split()):
-                matching_activities.append(activity)
+    if not _ACTIVITY_TRIGGERS.isdisjoint(query_words):
+        matching_activities = [
+            {'category': category, 'activities': activities}
+            for category, activities in _activity_categories().items()
+            if category in query_words
+        ]
         if matching_activities:
             results.append({'activities': matching_activities})
     
@@ -51,69 +77,72 @@ def get_prayer_times(city):
     
     return {
         'city': city,
-        'date': datetime.now().strftime('%Y-%m-%d'),
+        'date': _today(),
         'prayer_times': prayer_times
     }
 
+_BASE_COSTS = {
+    'budget': {'hotel': 150, 'food': 80, 'transport': 50, 'activities': 100},
+    'mid-range': {'hotel': 300, 'food': 150, 'transport': 100, 'activities': 200},
+    'luxury': {'hotel': 600, 'food': 300, 'transport': 200, 'activities': 400}
+}
+_DAILY_TOTALS = {category: sum(costs.values()) for category, costs in _BASE_COSTS.items()}
+
 def calculate_trip_budget(city, days, category):
     """Calculate trip budget"""
-    base_costs = {
-        'budget': {'hotel': 150, 'food': 80, 'transport': 50, 'activities': 100},
-        'mid-range': {'hotel': 300, 'food': 150, 'transport': 100, 'activities': 200},
-        'luxury': {'hotel': 600, 'food': 300, 'transport': 200, 'activities': 400}
-    }
-    
-    costs = base_costs.get(category, base_costs['mid-range'])
-    total_daily = sum(costs.values())
+    category_key = category if category in _BASE_COSTS else 'mid-range'
+    total_daily = _DAILY_TOTALS[category_key]
     total_cost = total_daily * days
     
     return {
         'city': city,
         'days': days,
         'category': category,
-        'daily_breakdown': costs,
+        'daily_breakdown': dict(_BASE_COSTS[category_key]),
         'daily_total': total_daily,
         'trip_total': total_cost
     }
 
 def run_comprehensive_test():
     """Run all tests"""
-    print("🇦🇪 UAE TOURISM ASSISTANT - FINAL TEST")
-    print("=" * 50)
+    _emit(["🇦🇪 UAE TOURISM ASSISTANT - FINAL TEST", "=" * 50])
     
     # Test 1: Knowledge Base Search
-    print("\n🔍 TEST 1: Knowledge Base Search")
+    lines = ["\n🔍 TEST 1: Knowledge Base Search"]
     result = search_uae_knowledge("attractions in Dubai")
     if result:
-        print("✅ Dubai attractions found:")
-        for attraction in result[0]['attractions']:
-            print(f"   • {attraction}")
+        lines.append("✅ Dubai attractions found:")
+        lines.extend(f"   • {attraction}" for attraction in result[0]['attractions'])
     else:
-        print("❌ Search failed")
+        lines.append("❌ Search failed")
+    _emit(lines)
     
     # Test 2: Prayer Times
-    print("\n🕌 TEST 2: Prayer Times")
     prayers = get_prayer_times("Dubai")
-    print(f"✅ Prayer times for {prayers['city']} on {prayers['date']}:")
-    for prayer, time in prayers['prayer_times'].items():
-        print(f"   • {prayer}: {time}")
+    _emit([
+        "\n🕌 TEST 2: Prayer Times",
+        f"✅ Prayer times for {prayers['city']} on {prayers['date']}:",
+        *(f"   • {prayer}: {prayer_time}" for prayer, prayer_time in prayers['prayer_times'].items())
+    ])
     
     # Test 3: Budget Calculator
-    print("\n💰 TEST 3: Budget Calculator")
     budget = calculate_trip_budget("Dubai", 3, "luxury")
-    print(f"✅ {budget['days']}-day {budget['category']} trip to {budget['city']}:")
-    print(f"   • Daily cost: ${budget['daily_total']}")
-    print(f"   • Total trip cost: ${budget['trip_total']}")
+    _emit([
+        "\n💰 TEST 3: Budget Calculator",
+        f"✅ {budget['days']}-day {budget['category']} trip to {budget['city']}:",
+        f"   • Daily cost: ${budget['daily_total']}",
+        f"   • Total trip cost: ${budget['trip_total']}"
+    ])
     
     # Test 4: Cultural Tips
-    print("\n🎭 TEST 4: Cultural Tips")
     kb = load_knowledge_base()
-    print("✅ Cultural tips loaded:")
-    for i, tip in enumerate(kb['cultural_tips'][:3], 1):
-        print(f"   {i}. {tip}")
+    _emit([
+        "\n🎭 TEST 4: Cultural Tips",
+        "✅ Cultural tips loaded:",
+        *(f"   {i}. {tip}" for i, tip in enumerate(kb['cultural_tips'][:3], 1))
+    ])
     
-    print("\n🎉 ALL TESTS COMPLETED SUCCESSFULLY!")
-    print("The UAE Tourism Assistant is ready to use!")
+    _emit(["\n🎉 ALL TESTS COMPLETED SUCCESSFULLY!", "The UAE Tourism Assistant is ready to use!"])
 
 if __name__ == "__main__":
     run_comprehensive_test()
\ No newline at end of file
@@ -4,126 +4,179 @@ Simple test script for UAE Tourism Assistant
 Run this to test the basic functionality without LangChain complexity
 """
 
-import json
-import os
+import mmap
+import re
+from functools import lru_cache
+from pathlib import Path
+from types import MappingProxyType
 
-# Change to the project directory
-os.chdir(r"d:\Projects\smart_tourism_assistant")
+import numpy as np
 
+from uae_common import emit as _emit, loads as _loads
+
+_KB_PATH = Path(__file__).with_name('uae_knowledge.json')
+
+@lru_cache(maxsize=1)
 def load_knowledge_base():
-    """Load the UAE knowledge base from JSON file"""
+    """Load the UAE knowledge base from JSON file (parsed once per process)"""
     try:
-        with open('uae_knowledge.json', 'r', encoding='utf-8') as f:
-            return json.load(f)
+        with open(_KB_PATH, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as data:
+                knowledge_base = _loads(data)
     except FileNotFoundError:
         print("Warning: uae_knowledge.json not found")
-        return {}
+        return MappingProxyType({})
+    
+    # The data is static, so split out each city's must-visit attractions once
+    for city_data in knowledge_base.get('cities', {}).values():
+        city_data['_must_visit'] = tuple(attr for attr in city_data['major_attractions'] if attr.get('must_visit', False))
+    
+    return MappingProxyType(knowledge_base)
+
+_WORD_RE = re.compile(r"\w+")
+_CITY_TRIGGERS = frozenset({'city', 'cities', 'attractions', 'visit'})
+_CITY_PHRASE_RE = re.compile(r"things to do")
+_CULTURE_TRIGGERS = frozenset({'culture', 'cultural', 'etiquette', 'tips', 'customs'})
+
+@lru_cache(maxsize=1)
+def _city_token_index():
+    """Map every lowercase word of a city name to that city"""
+    cities = load_knowledge_base().get('cities', {})
+    return {token: city_name for city_name in cities for token in city_name.lower().split()}
 
 def search_uae_knowledge(query: str) -> str:
     """Search the UAE knowledge base with fixed city matching"""
     knowledge_base = load_knowledge_base()
     query_lower = query.lower()
+    query_words = set(_WORD_RE.findall(query_lower))
+    wants_things_to_do = _CITY_PHRASE_RE.search(query_lower) is not None
     results = []
     
     # Search in cities - fixed city name matching
-    if any(word in query_lower for word in ['city', 'cities', 'attractions', 'things to do', 'visit']):
+    if wants_things_to_do or not _CITY_TRIGGERS.isdisjoint(query_words):
+        city_index = _city_token_index()
+        mentioned_cities = {city_index[token] for token in query_words if token in city_index}
         cities = knowledge_base.get('cities', {})
         for city_name, city_data in cities.items():
-            city_lower = city_name.lower()
-            if city_lower in query_lower or any(part in query_lower for part in city_lower.split()):
-                result = f"**{city_name}:**\n{city_data['description']}\n"
+            if city_name in mentioned_cities:
+                parts = [f"**{city_name}:**\n{city_data['description']}\n"]
                 
-                if 'attractions' in query_lower or 'things to do' in query_lower:
-                    result += f"\n**Top Attractions in {city_name}:**\n"
-                    must_visit = [attr for attr in city_data['major_attractions'] if attr.get('must_visit', False)]
-                    
-                    for attraction in must_visit:
-                        result += f"• {attraction['name']}: {attraction['description']}\n"
+                if 'attractions' in query_words or wants_things_to_do:
+                    parts.append(f"\n**Top Attractions in {city_name}:**\n")
+                    for attraction in city_data['_must_visit']:
+                        parts.append(f"• {attraction['name']}: {attraction['description']}\n")
                 
-                result += f"\n**Best Time to Visit:** {city_data['best_time_to_visit']}"
-                results.append(result)
+                parts.append(f"\n**Best Time to Visit:** {city_data['best_time_to_visit']}")
+                results.append("".join(parts))
     
     # Search for cultural tips
-    if any(word in query_lower for word in ['culture', 'cultural', 'etiquette', 'tips', 'customs']):
+    if not _CULTURE_TRIGGERS.isdisjoint(query_words):
         cultural_tips = knowledge_base.get('cultural_tips', [])
-        result = "**Cultural Tips for Visiting UAE:**\n"
+        parts = ["**Cultural Tips for Visiting UAE:**\n"]
         for tip in cultural_tips:
-            result += f"• **{tip['category']}:** {tip['tip']}\n"
-        results.append(result)
+            parts.append(f"• **{tip['category']}:** {tip['tip']}\n")
+        results.append("".join(parts))
     
     if not results:
         return "I couldn't find specific information about your query. Could you please ask about UAE cities, attractions, cultural tips, or activities?"
     
     return "\n\n".join(results)
 
+_PRAYER_TIMES = {
+    'dubai': {'fajr': '05:30', 'dhuhr': '12:15', 'asr': '15:45', 'maghrib': '18:30', 'isha': '20:00'},
+    'abu dhabi': {'fajr': '05:35', 'dhuhr': '12:20', 'asr': '15:50', 'maghrib': '18:35', 'isha': '20:05'},
+    'sharjah': {'fajr': '05:28', 'dhuhr': '12:12', 'asr': '15:42', 'maghrib': '18:27', 'isha': '19:57'}
+}
+
+# The times are static, so each city's listing is formatted once at import
+_PRAYER_STRINGS = {
+    city: "\n".join(f"• **{prayer.title()}:** {time}" for prayer, time in times.items())
+    for city, times in _PRAYER_TIMES.items()
+}
+_PRAYER_CITIES = ', '.join(c.title() for c in _PRAYER_TIMES)
+
 def get_prayer_times(city_query: str) -> str:
     """Get prayer times for UAE cities"""
-    prayer_times = {
-        'dubai': {'fajr': '05:30', 'dhuhr': '12:15', 'asr': '15:45', 'maghrib': '18:30', 'isha': '20:00'},
-        'abu dhabi': {'fajr': '05:35', 'dhuhr': '12:20', 'asr': '15:50', 'maghrib': '18:35', 'isha': '20:05'},
-        'sharjah': {'fajr': '05:28', 'dhuhr': '12:12', 'asr': '15:42', 'maghrib': '18:27', 'isha': '19:57'}
-    }
-    
     parts = city_query.split(',')
     city = parts[0].strip().lower()
     date_str = parts[1].strip() if len(parts) > 1 else "2025-09-30"
     
-    if city not in prayer_times:
-        available_cities = ', '.join([c.title() for c in prayer_times.keys()])
-        return f"Prayer times not available for '{city}'. Available cities: {available_cities}"
-    
-    times = prayer_times[city]
-    result = f"**Prayer Times for {city.title()} ({date_str}):**\n"
-    result += f"• **Fajr:** {times['fajr']}\n"
-    result += f"• **Dhuhr:** {times['dhuhr']}\n"
-    result += f"• **Asr:** {times['asr']}\n"
-    result += f"• **Maghrib:** {times['maghrib']}\n"
-    result += f"• **Isha:** {times['isha']}\n"
-    result += "\n*Note: Times are approximate and may vary by season.*"
+    if city not in _PRAYER_STRINGS:
+        return f"Prayer times not available for '{city}'. Available cities: {_PRAYER_CITIES}"
     
-    return result
+    return (f"**Prayer Times for {city.title()} ({date_str}):**\n{_PRAYER_STRINGS[city]}\n"
+            "\n*Note: Times are approximate and may vary by season.*")
+
+_BASE_COSTS = {'budget': 150, 'standard': 400, 'luxury': 1000}
+_CITY_MULTIPLIERS = {'dubai': 1.2, 'abu dhabi': 1.1, 'sharjah': 0.9}
 
+# Array views of the tables above for vectorised lookups
+_STYLE_INDEX = {style: i for i, style in enumerate(_BASE_COSTS)}
+_CITY_INDEX = {city: i for i, city in enumerate(_CITY_MULTIPLIERS)}
+_COST_TABLE = np.array(list(_BASE_COSTS.values()), dtype=float)
+_MULT_TABLE = np.array(list(_CITY_MULTIPLIERS.values()), dtype=float)
+_MAX_DAYS_DIGITS = 6
+
+# Splits 'city,days,style' and trims each field in a single match
+_BUDGET_QUERY_RE = re.compile(r"\s*(?P<city>[^,]*?)\s*,\s*(?P<days>[^,]*?)\s*,\s*(?P<style>[^,]*?)\s*")
+
+@lru_cache(maxsize=256)
 def calculate_trip_budget(budget_query: str) -> str:
     """Calculate trip budget"""
-    base_costs = {'budget': 150, 'standard': 400, 'luxury': 1000}
-    city_multipliers = {'dubai': 1.2, 'abu dhabi': 1.1, 'sharjah': 0.9}
+    match = _BUDGET_QUERY_RE.fullmatch(budget_query.lower())
+    if not match:
+        return "Please provide input in format: 'city,days,style'. Example: 'Dubai,5,standard'"
     
-    try:
-        parts = [part.strip().lower() for part in budget_query.split(',')]
-        if len(parts) != 3:
-            return "Please provide input in format: 'city,days,style'. Example: 'Dubai,5,standard'"
-        
-        city, days_str, style = parts
-        days = int(days_str)
-        
-        if style not in base_costs:
-            return f"Travel style must be one of: {', '.join(base_costs.keys())}"
-        
-        if city not in city_multipliers:
-            available_cities = ', '.join([c.title() for c in city_multipliers.keys()])
-            return f"City not recognized. Available cities: {available_cities}"
-        
-        base_cost_per_day = base_costs[style]
-        city_multiplier = city_multipliers[city]
-        cost_per_day = base_cost_per_day * city_multiplier
-        total_cost = cost_per_day * days
-        
-        result = f"**Trip Budget Estimate for {city.title()}**\n"
-        result += f"**Duration:** {days} days\n"
-        result += f"**Travel Style:** {style.title()}\n\n"
-        result += f"**Total Trip Cost: {total_cost:.0f} AED**\n"
-        result += f"*Approximately ${total_cost/3.67:.0f} USD*"
-        
-        return result
-    except ValueError:
+    city, days_str, style = match.group('city', 'days', 'style')
+    if not days_str.isdecimal():
         return "Please provide a valid number for days."
-    except Exception as e:
-        return f"Error calculating budget: {str(e)}"
+    # Also keeps int() clear of its digit limit and the cost maths clear of float overflow
+    if len(days_str) > _MAX_DAYS_DIGITS:
+        return "Number of days is too large."
+    days = int(days_str)
+    
+    if style not in _BASE_COSTS:
+        return f"Travel style must be one of: {', '.join(_BASE_COSTS.keys())}"
+    
+    if city not in _CITY_MULTIPLIERS:
+        available_cities = ', '.join([c.title() for c in _CITY_MULTIPLIERS.keys()])
+        return f"City not recognized. Available cities: {available_cities}"
+    
+    base_cost_per_day = _BASE_COSTS[style]
+    city_multiplier = _CITY_MULTIPLIERS[city]
+    cost_per_day = base_cost_per_day * city_multiplier
+    total_cost = cost_per_day * days
+    
+    result = f"**Trip Budget Estimate for {city.title()}**\n"
+    result += f"**Duration:** {days} days\n"
+    result += f"**Travel Style:** {style.title()}\n\n"
+    result += f"**Total Trip Cost: {total_cost:.0f} AED**\n"
+    result += f"*Approximately ${total_cost/3.67:.0f} USD*"
+    
+    return result
+
+def calculate_trip_budget_batch(cities, days, styles) -> np.ndarray:
+    """Calculate total trip costs in AED for many (city, days, style) combinations at once"""
+    try:
+        city_idx = np.fromiter((_CITY_INDEX[c.strip().lower()] for c in cities), dtype=np.intp)
+        style_idx = np.fromiter((_STYLE_INDEX[s.strip().lower()] for s in styles), dtype=np.intp)
+    except KeyError as e:
+        raise ValueError(f"Unknown city or travel style: {e.args[0]}") from None
+    
+    days = np.asarray(days)
+    if days.ndim != 1:
+        raise ValueError("days must be a sequence with one entry per city")
+    if not city_idx.shape == days.shape == style_idx.shape:
+        raise ValueError(f"cities, days and styles must have the same length, "
+                         f"got {city_idx.size}, {days.size} and {style_idx.size}")
+    if not np.issubdtype(days.dtype, np.integer) or (days <= 0).any():
+        raise ValueError("Number of days must be positive integers")
+    
+    return _COST_TABLE[style_idx] * _MULT_TABLE[city_idx] * days
 
 def main():
     """Main testing function"""
-    print("🇦🇪 UAE Tourism Assistant - Simple Test")
-    print("=" * 50)
+    _emit(["🇦🇪 UAE Tourism Assistant - Simple Test", "=" * 50])
     
     # Test scenarios
     test_cases = [
@@ -131,28 +184,31 @@ def main():
         ("Prayer Times", "Dubai", get_prayer_times),
         ("Budget Calculator", "Dubai,3,luxury", calculate_trip_budget),
         ("Cultural Tips", "cultural tips", search_uae_knowledge),
-        ("Activities", "adventure activities", search_uae_knowledge)
+        ("Activities", "adventure activities", search_uae_knowledge),
+        ("Batch Budget Calculator", (["Dubai", "Abu Dhabi", "Sharjah"], [3, 5, 2], ["luxury", "standard", "budget"]),
+         lambda args: calculate_trip_budget_batch(*args))
     ]
     
     for test_name, query, function in test_cases:
-        print(f"\n🧪 Testing {test_name}")
-        print(f"Query: '{query}'")
-        print("-" * 30)
+        lines = [f"\n🧪 Testing {test_name}", f"Query: '{query}'", "-" * 30]
         
         try:
             result = function(query)
-            print(result)
-            print("✅ Test passed!")
+            lines.extend([str(result), "✅ Test passed!"])
         except Exception as e:
-            print(f"❌ Test failed: {e}")
+            lines.append(f"❌ Test failed: {e}")
         
-        print("\n" + "=" * 50)
+        lines.append("\n" + "=" * 50)
+        _emit(lines)
     
-    print("\n🎯 All tests completed!")
-    print("\nTo test interactively, call:")
-    print("- search_uae_knowledge('your query')")
-    print("- get_prayer_times('city')")
-    print("- calculate_trip_budget('city,days,style')")
+    _emit([
+        "\n🎯 All tests completed!",
+        "\nTo test interactively, call:",
+        "- search_uae_knowledge('your query')",
+        "- get_prayer_times('city')",
+        "- calculate_trip_budget('city,days,style')",
+        "- calculate_trip_budget_batch(cities, days, styles)"
+    ])
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -3,26 +3,92 @@ Smart UAE Tourism Assistant - LangChain Multi-Tool Agent
 A comprehensive AI assistant for UAE tourism information and trip planning.
 """
 
+import asyncio
 import os
+import re
 import sys
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
 from dotenv import load_dotenv
 
 from langchain.agents import AgentExecutor, create_react_agent
 from langchain.memory import ConversationBufferMemory
 from langchain.prompts import PromptTemplate
-from langchain_core.tools import Tool
+from langchain_core.tools import BaseTool
 from langchain_openai import ChatOpenAI
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_groq import ChatGroq
 
 # Import custom tools
-from uae_tools import UAEKnowledgeSearchTool, PrayerTimeTool, TripBudgetPlanner
+from uae_tools import uae_knowledge_search, prayer_times, trip_budget_planner, ERROR_MESSAGE_PREFIXES
+
+# Read .env once per process rather than on every agent construction
+load_dotenv()
+
+
+def _require_env(name: str) -> str:
+    """Return a required environment variable, raising if it is missing"""
+    value = os.getenv(name)
+    if not value:
+        raise ValueError(f"{name} not found in environment variables")
+    return value
+
+
+_LLM_FACTORIES = {
+    "openai": lambda: ChatOpenAI(
+        model="gpt-3.5-turbo",
+        temperature=0.7,
+        api_key=_require_env("OPENAI_API_KEY")
+    ),
+    "gemini": lambda: ChatGoogleGenerativeAI(
+        model="gemini-pro",
+        temperature=0.7,
+        google_api_key=_require_env("GOOGLE_API_KEY")
+    ),
+    "groq": lambda: ChatGroq(
+        model="mixtral-8x7b-32768",
+        temperature=0.7,
+        groq_api_key=_require_env("GROQ_API_KEY")
+    ),
+}
+
+# UAE cities recognised in user requests, matched in a single pass
+_CITY_RE = re.compile(
+    "|".join(map(re.escape, ["dubai", "abu dhabi", "sharjah", "ajman", "ras al khaimah", "fujairah", "umm al quwain"])),
+    re.IGNORECASE
+)
+
+# Intent patterns for requests that can be answered by a single tool call
+_PRAYER_INTENT_RE = re.compile(r"\bprayers?\b|\bsalah\b|\bnamaz\b", re.IGNORECASE)
+_BUDGET_INTENT_RE = re.compile(r"\b(?:budget|cost|costs|price|how much)\b", re.IGNORECASE)
+_KNOWLEDGE_INTENT_RE = re.compile(
+    r"\b(?:attractions|culture|cultural|etiquette|customs|activities|weather|climate|"
+    r"transport|transportation|metro|taxi|food|cuisine|dishes|restaurants)\b",
+    re.IGNORECASE
+)
+# Words that refer back to an earlier turn ("what about the food there?"), which only the agent's memory can resolve
+_CONTEXT_REFERENCE_RE = re.compile(r"\b(?:there|it|that|those|them|what about|how about)\b", re.IGNORECASE)
+_DATE_RE = re.compile(r"\b\d{4}-\d{2}-\d{2}\b")
+# Any other way of naming a day, which the prayer times tool can't take as input
+_OTHER_DATE_RE = re.compile(
+    r"\b(?:today|tonight|tomorrow|yesterday|week|weekend|month|"
+    r"monday|tuesday|wednesday|thursday|friday|saturday|sunday|"
+    r"january|february|march|april|may|june|july|august|september|october|november|december|"
+    r"jan|feb|mar|apr|jun|jul|aug|sep|sept|oct|nov|dec|\d{1,2}(?:st|nd|rd|th))\b|"
+    r"\b\d{1,2}[/.]\d{1,2}(?:[/.]\d{2,4})?\b",
+    re.IGNORECASE
+)
+_DAYS_RE = re.compile(r"\b(\d+)[\s-]*days?\b", re.IGNORECASE)
+_STYLE_RE = re.compile(r"\b(?:budget|standard|luxury)\b", re.IGNORECASE)
+
+_TRIP_FALLBACK_MESSAGE = "I'd be happy to help you plan your UAE trip! Could you provide more details about which city you'd like to visit and how many days you're planning to stay?"
+_TRIP_INTERRUPTED_MESSAGE = "⚠️ Sorry, this recommendation was cut off by an error and is incomplete. Please ask again for the full plan."
 
 
 class SmartUAEAgent:
     """Main class for the Smart UAE Tourism Assistant"""
     
+    __slots__ = ('llm_provider', 'llm', 'memory', 'tools', 'tools_by_name', 'agent_executor')
+    
     def __init__(self, llm_provider: str = "openai"):
         """
         Initialize the Smart UAE Agent
@@ -30,8 +96,6 @@ class SmartUAEAgent:
         Args:
             llm_provider: Choice of LLM provider ('openai', 'gemini', or 'groq')
         """
-        load_dotenv()
-        
         self.llm_provider = llm_provider
         self.llm = self._initialize_llm()
         self.memory = ConversationBufferMemory(
@@ -41,49 +105,23 @@ class SmartUAEAgent:
             output_key='output'
         )
         self.tools = self._initialize_tools()
+        self.tools_by_name = {tool.name: tool for tool in self.tools}
         self.agent_executor = self._create_agent()
     
     def _initialize_llm(self):
         """Initialize the chosen LLM"""
-        if self.llm_provider == "openai":
-            api_key = os.getenv("OPENAI_API_KEY")
-            if not api_key:
-                raise ValueError("OPENAI_API_KEY not found in environment variables")
-            return ChatOpenAI(
-                model="gpt-3.5-turbo",
-                temperature=0.7,
-                api_key=api_key
-            )
-        
-        elif self.llm_provider == "gemini":
-            api_key = os.getenv("GOOGLE_API_KEY")
-            if not api_key:
-                raise ValueError("GOOGLE_API_KEY not found in environment variables")
-            return ChatGoogleGenerativeAI(
-                model="gemini-pro",
-                temperature=0.7,
-                google_api_key=api_key
-            )
-        
-        elif self.llm_provider == "groq":
-            api_key = os.getenv("GROQ_API_KEY")
-            if not api_key:
-                raise ValueError("GROQ_API_KEY not found in environment variables")
-            return ChatGroq(
-                model="mixtral-8x7b-32768",
-                temperature=0.7,
-                groq_api_key=api_key
-            )
-        
-        else:
-            raise ValueError("LLM provider must be 'openai', 'gemini', or 'groq'")
+        try:
+            factory = _LLM_FACTORIES[self.llm_provider]
+        except KeyError:
+            raise ValueError("LLM provider must be 'openai', 'gemini', or 'groq'") from None
+        return factory()
     
-    def _initialize_tools(self) -> List[Tool]:
+    def _initialize_tools(self) -> List[BaseTool]:
         """Initialize all available tools"""
         return [
-            UAEKnowledgeSearchTool(),
-            PrayerTimeTool(),
-            TripBudgetPlanner()
+            uae_knowledge_search,
+            prayer_times,
+            trip_budget_planner
         ]
     
     def _create_agent(self) -> AgentExecutor:
@@ -155,19 +193,106 @@ Think step by step about how to help the user. Consider:
         Returns:
             Agent's response
         """
+        # Trip recommendations are all-or-nothing here: a reply cut short mid-stream
+        # falls back to the standard message instead of returning partial text
+        if self._is_trip_planning_request(user_input):
+            return self._generate_trip_recommendation(user_input)
+        
+        return "".join(self.chat_stream(user_input))
+    
+    def chat_stream(self, user_input: str) -> Iterator[str]:
+        """
+        Streaming chat interface that yields the response as it is generated
+        
+        Trip planning responses are streamed token by token from the LLM;
+        tool-backed agent responses are yielded as a single chunk.
+        
+        Args:
+            user_input: User's question or request
+            
+        Yields:
+            Chunks of the agent's response
+        """
         try:
             # Check if this is a trip planning request that should use LLM directly
             if self._is_trip_planning_request(user_input):
-                return self._generate_trip_recommendation(user_input)
+                yield from self._stream_trip_recommendation(user_input)
+                return
+            
+            # Answer unambiguous tool requests directly, without the ReAct loop
+            response = self._run_routed_tool(user_input)
+            if response is not None:
+                yield response
+                return
             
             # Otherwise, use the agent with tools
             response = self.agent_executor.invoke({"input": user_input})
-            return response["output"]
+            yield response["output"]
             
         except Exception as e:
             error_msg = f"I encountered an error: {str(e)}"
             print(f"Error in chat: {e}")
-            return error_msg
+            yield error_msg
+    
+    async def achat(self, user_input: str) -> str:
+        """
+        Async version of chat that does not block the event loop on LLM or tool calls
+        
+        Args:
+            user_input: User's question or request
+            
+        Returns:
+            Agent's response
+        """
+        return (await self.achat_many([user_input]))[0]
+    
+    async def achat_many(self, user_inputs: List[str]) -> List[str]:
+        """
+        Answer several requests from this agent's conversation
+        
+        Trip planning requests don't use conversation memory, so they are sent
+        to the LLM as one batch. The remaining requests share the agent's memory,
+        so they run one after another in input order while the batch is in flight.
+        
+        Args:
+            user_inputs: User questions or requests
+            
+        Returns:
+            Agent responses, in the same order as the inputs
+        """
+        async def run_agent(user_input: str) -> str:
+            try:
+                response = await asyncio.to_thread(self._run_routed_tool, user_input)
+                if response is not None:
+                    return response
+                
+                response = await self.agent_executor.ainvoke({"input": user_input})
+                return response["output"]
+            except Exception as e:
+                print(f"Error in chat: {e}")
+                return f"I encountered an error: {str(e)}"
+        
+        async def run_agent_sequentially(inputs: List[str]) -> List[str]:
+            return [await run_agent(user_input) for user_input in inputs]
+        
+        trip_indices, agent_indices = [], []
+        for i, user_input in enumerate(user_inputs):
+            if self._is_trip_planning_request(user_input):
+                trip_indices.append(i)
+            else:
+                agent_indices.append(i)
+        
+        trip_responses, agent_responses = await asyncio.gather(
+            self._agenerate_trip_recommendations([user_inputs[i] for i in trip_indices]),
+            run_agent_sequentially([user_inputs[i] for i in agent_indices])
+        )
+        
+        responses = [""] * len(user_inputs)
+        for i, response in zip(trip_indices, trip_responses):
+            responses[i] = response
+        for i, response in zip(agent_indices, agent_responses):
+            responses[i] = response
+        return responses
     
     def _is_trip_planning_request(self, user_input: str) -> bool:
         """Check if the request is for trip planning/recommendations"""
@@ -180,29 +305,78 @@ Think step by step about how to help the user. Consider:
         user_lower = user_input.lower()
         return any(keyword in user_lower for keyword in trip_keywords)
     
-    def _generate_trip_recommendation(self, user_input: str) -> str:
-        """Generate LLM-based trip recommendations"""
-        try:
-            # First, get relevant information using tools if needed
-            context = ""
-            
-            # Extract city name if mentioned
-            cities = ["dubai", "abu dhabi", "sharjah", "ajman", "ras al khaimah", "fujairah", "umm al quwain"]
-            mentioned_city = None
-            
-            for city in cities:
-                if city in user_input.lower():
-                    mentioned_city = city
-                    break
+    def _route(self, user_input: str) -> Optional[Tuple[str, str]]:
+        """
+        Match requests that map unambiguously onto one tool
+        
+        Args:
+            user_input: User's question or request
             
-            # Get city information if a city is mentioned
-            if mentioned_city:
-                knowledge_tool = UAEKnowledgeSearchTool()
-                city_info = knowledge_tool._run(f"attractions in {mentioned_city}")
-                context += f"\nCITY INFORMATION:\n{city_info}\n"
+        Returns:
+            (tool name, tool input), or None if the request needs the full agent
+        """
+        is_prayer = _PRAYER_INTENT_RE.search(user_input) is not None
+        is_budget = _BUDGET_INTENT_RE.search(user_input) is not None
+        is_knowledge = _KNOWLEDGE_INTENT_RE.search(user_input) is not None
+        
+        # Requests with several intents need more than one tool, so they go to the agent
+        if is_prayer + is_budget + is_knowledge != 1:
+            return None
+        
+        city = self._find_mentioned_city(user_input)
+        
+        # Without a named city, a request that refers back to earlier turns needs conversation context
+        if not city and _CONTEXT_REFERENCE_RE.search(user_input):
+            return None
+        
+        if is_prayer:
+            # The tool only takes an ISO date, so a relative or written-out date needs the agent
+            if not city or _OTHER_DATE_RE.search(_DATE_RE.sub("", user_input)):
+                return None
+            date_match = _DATE_RE.search(user_input)
+            return "prayer_times", f"{city},{date_match.group(0)}" if date_match else city
+        
+        if is_budget:
+            days_match = _DAYS_RE.search(user_input)
+            if not city or not days_match:
+                return None
             
-            # Enhanced prompt for trip recommendations
-            recommendation_prompt = f"""
+            # 'budget' is both the intent keyword and a travel style, so it
+            # only counts as the style when it is the sole style mentioned twice
+            styles = [style.lower() for style in _STYLE_RE.findall(user_input)]
+            specific_styles = set(styles) - {"budget"}
+            if len(specific_styles) == 1:
+                style = specific_styles.pop()
+            elif not specific_styles and styles.count("budget") > 1:
+                style = "budget"
+            else:
+                return None
+            return "trip_budget_planner", f"{city},{days_match.group(1)},{style}"
+        
+        return "uae_knowledge_search", user_input
+    
+    def _run_routed_tool(self, user_input: str) -> Optional[str]:
+        """Answer the request with a direct tool call if it can be routed, recording it in memory"""
+        route = self._route(user_input)
+        if route is None:
+            return None
+        
+        tool_name, tool_input = route
+        response = self.tools_by_name[tool_name].func(tool_input)
+        if response.startswith(ERROR_MESSAGE_PREFIXES):
+            return None
+        
+        self.memory.save_context({"input": user_input}, {"output": response})
+        return response
+    
+    def _find_mentioned_city(self, user_input: str) -> Optional[str]:
+        """Return the first UAE city mentioned in the request, if any"""
+        match = _CITY_RE.search(user_input)
+        return match.group(0).lower() if match else None
+    
+    def _build_trip_prompt(self, user_input: str, context: str) -> str:
+        """Build the trip recommendation prompt for the LLM"""
+        return f"""
 As a UAE Tourism Expert, create a detailed trip recommendation for the following request:
 
 USER REQUEST: {user_input}
@@ -222,14 +396,73 @@ Please provide a comprehensive response that includes:
 Make the response engaging, informative, and practical. Use bullet points and clear formatting.
 Ensure all recommendations are accurate and culturally appropriate for the UAE.
 """
-
-            # Generate recommendation using the LLM directly
-            response = self.llm.invoke(recommendation_prompt)
-            return response.content
-            
+    
+    def _iter_trip_recommendation(self, user_input: str) -> Iterator[str]:
+        """Yield LLM-based trip recommendation chunks, letting any error propagate"""
+        # First, get relevant information using tools if needed
+        context = ""
+        
+        # Get city information if a city is mentioned
+        mentioned_city = self._find_mentioned_city(user_input)
+        if mentioned_city:
+            city_info = uae_knowledge_search.func(f"attractions in {mentioned_city}")
+            context += f"\nCITY INFORMATION:\n{city_info}\n"
+        
+        # Generate recommendation using the LLM directly
+        for chunk in self.llm.stream(self._build_trip_prompt(user_input, context)):
+            yield chunk.content
+    
+    def _generate_trip_recommendation(self, user_input: str) -> str:
+        """Generate a complete trip recommendation, or the fallback message if anything fails"""
+        try:
+            return "".join(self._iter_trip_recommendation(user_input))
+        except Exception as e:
+            print(f"Error generating trip recommendation: {e}")
+            return _TRIP_FALLBACK_MESSAGE
+    
+    def _stream_trip_recommendation(self, user_input: str) -> Iterator[str]:
+        """Stream LLM-based trip recommendations, flagging a reply cut short by an error"""
+        streamed = False
+        try:
+            for chunk in self._iter_trip_recommendation(user_input):
+                streamed = True
+                yield chunk
+        except Exception as e:
+            if streamed:
+                # Part of the reply is already out, so say it's incomplete in the stream itself
+                yield f"\n\n{_TRIP_INTERRUPTED_MESSAGE} ({e})"
+            else:
+                print(f"Error generating trip recommendation: {e}")
+                yield _TRIP_FALLBACK_MESSAGE
+    
+    async def _agenerate_trip_recommendations(self, user_inputs: List[str]) -> List[str]:
+        """Generate trip recommendations for several requests with a single batched LLM call"""
+        if not user_inputs:
+            return []
+        
+        async def build_prompt(user_input: str) -> str:
+            context = ""
+            mentioned_city = self._find_mentioned_city(user_input)
+            if mentioned_city:
+                city_info = await uae_knowledge_search.ainvoke(f"attractions in {mentioned_city}")
+                context += f"\nCITY INFORMATION:\n{city_info}\n"
+            return self._build_trip_prompt(user_input, context)
+        
+        try:
+            prompts = await asyncio.gather(*(build_prompt(user_input) for user_input in user_inputs))
+            responses = await self.llm.abatch(prompts, return_exceptions=True)
         except Exception as e:
             print(f"Error generating trip recommendation: {e}")
-            return "I'd be happy to help you plan your UAE trip! Could you provide more details about which city you'd like to visit and how many days you're planning to stay?"
+            return [_TRIP_FALLBACK_MESSAGE] * len(user_inputs)
+        
+        results = []
+        for response in responses:
+            if isinstance(response, Exception):
+                print(f"Error generating trip recommendation: {response}")
+                results.append(_TRIP_FALLBACK_MESSAGE)
+            else:
+                results.append(response.content)
+        return results
     
     def get_conversation_history(self) -> str:
         """Get the current conversation history"""
@@ -286,8 +519,10 @@ def main():
                 continue
             
             print("\n🔍 Processing your request...")
-            response = agent.chat(user_input)
-            print(f"\n✈️ UAE Tourism Assistant:\n{response}")
+            print("\n✈️ UAE Tourism Assistant:")
+            for chunk in agent.chat_stream(user_input):
+                print(chunk, end="", flush=True)
+            print()
             
         except KeyboardInterrupt:
             print("\n\nGoodbye! Safe travels! 🌟")
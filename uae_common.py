@@ -0,0 +1,34 @@
+"""
+Small helpers shared by the UAE tools and the standalone test scripts
+Only depends on the standard library (orjson is used when installed)
+"""
+
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+try:
+    from orjson import loads  # faster decoding, reads the mapped file without a copy
+except ImportError:
+    import json
+
+    def loads(data):
+        return json.loads(bytes(data))
+
+
+_TODAY_CACHE = [0.0, '']  # [next local midnight as a timestamp, today's date string]
+
+def today() -> str:
+    """Return today's date as YYYY-MM-DD, formatting it only once per day"""
+    now = time.time()
+    if now >= _TODAY_CACHE[0]:
+        day = date.fromtimestamp(now)
+        next_midnight = datetime.combine(day + timedelta(days=1), datetime.min.time()).timestamp()
+        _TODAY_CACHE[:] = [next_midnight, day.isoformat()]
+    return _TODAY_CACHE[1]
+
+
+def emit(lines):
+    """Write a block of output lines with a single write and flush"""
+    sys.stdout.write("\n".join(lines) + "\n")
+    sys.stdout.flush()
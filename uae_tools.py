@@ -2,93 +2,193 @@
 Custom LangChain tools for the Smart UAE Tourism Assistant
 """
 
-import json
+import mmap
 import os
-from datetime import datetime
-from typing import Optional, Dict, Any, List
-import requests
-from langchain.tools import BaseTool
+import re
+import sys
+from functools import lru_cache
+from typing import Optional, Dict, Any, List, Tuple
+from langchain.tools import tool
 from pydantic import BaseModel, Field
 
+from uae_common import loads as _loads, today as _today
 
-class UAEKnowledgeSearchTool(BaseTool):
-    """Tool for searching UAE tourism knowledge base"""
+
+# Query keywords for each knowledge search, in dispatch order
+_CATEGORY_KEYWORDS = {
+    'cities': ('city', 'cities', 'attractions', 'things to do', 'visit'),
+    'culture': ('culture', 'cultural', 'etiquette', 'tips', 'customs'),
+    'activities': ('activities', 'activity', 'adventure', 'luxury', 'family'),
+    'transportation': ('transport', 'transportation', 'metro', 'taxi', 'bus', 'travel'),
+    'food': ('food', 'restaurant', 'dining', 'eat', 'cuisine'),
+    'weather': ('weather', 'temperature', 'climate', 'season'),
+}
+_CATEGORY_BITS = {category: 1 << bit for bit, category in enumerate(_CATEGORY_KEYWORDS)}
+
+# Categories whose search falls back to a generic section when no specific keyword matches
+_DEFAULTING_CATEGORIES = frozenset({'transportation', 'food'})
+
+# One pass over the query finds every keyword, with a named group per category. The
+# lookahead lets matches overlap (e.g. 'eat' inside 'weather'), so results are the
+# same as plain substring tests.
+_CATEGORY_RE = re.compile("(?=" + "|".join(
+    f"(?P<{category}>{'|'.join(map(re.escape, keywords))})" for category, keywords in _CATEGORY_KEYWORDS.items()
+) + ")")
+
+
+def _mention_pattern(names) -> re.Pattern:
+    """Compile a pattern whose group 1 is each occurrence of one of the given lowercase names"""
+    alternatives = "|".join(map(re.escape, sorted(names, key=len, reverse=True)))
+    # The lookahead lets mentions overlap, matching the plain substring tests it replaces
+    return re.compile(f"(?=({alternatives}))" if alternatives else "(?!)")
+
+
+# Query words that ask for a city's attractions, or for the overview of every emirate
+_ATTRACTION_QUERY_RE = re.compile("attractions|things to do|visit")
+_OVERVIEW_QUERY_RE = re.compile("cities|emirates|overview")
+
+# City keys of the transportation section, in the order they're reported
+_TRANSPORT_CITIES = ('dubai', 'abu_dhabi')
+_TRANSPORT_CITY_RE = _mention_pattern(_TRANSPORT_CITIES)
+
+NO_RESULTS_MESSAGE = "I couldn't find specific information about your query. Could you please be more specific or ask about UAE cities, attractions, cultural tips, activities, transportation, food, or weather?"
+
+# Leading text of every message a tool returns instead of an answer (nothing found or invalid input)
+ERROR_MESSAGE_PREFIXES = (
+    NO_RESULTS_MESSAGE,
+    "Prayer times not available",
+    "Please provide input in format",
+    "Number of days",
+    "Travel style must be one of",
+    "City not recognized",
+)
+
+
+def _classify_query(query_lower: str) -> Tuple[str, ...]:
+    """Knowledge categories the lowercased query asks about, in dispatch order"""
+    category_mask = 0
+    for match in _CATEGORY_RE.finditer(query_lower):
+        category_mask |= _CATEGORY_BITS[match.lastgroup]
     
-    name = "uae_knowledge_search"
-    description = """Search the UAE knowledge base for information about cities, attractions, cultural tips, activities, and travel information. 
-    Use this tool when users ask about:
-    - Tourist attractions in specific UAE cities
-    - Cultural tips and etiquette
-    - Activities and things to do
-    - Transportation information
-    - Food and dining
-    - Weather information
-    - General UAE facts
+    return tuple(category for category, bit in _CATEGORY_BITS.items() if category_mask & bit)
+
+
+@lru_cache(maxsize=1)
+def _load_kb() -> Dict[str, Any]:
+    """Load the UAE knowledge base from JSON file (parsed once and shared by every tool instance)"""
+    try:
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        json_path = os.path.join(current_dir, 'uae_knowledge.json')
+        
+        with open(json_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as data:
+                knowledge_base = _loads(data)
+    except FileNotFoundError:
+        print("Warning: uae_knowledge.json not found. Using empty knowledge base.")
+        return {}
+    except ValueError:  # invalid JSON (json and orjson decode errors), or an empty file that can't be mapped
+        print("Warning: Invalid JSON in uae_knowledge.json. Using empty knowledge base.")
+        return {}
     
-    Input should be a search query like 'attractions in Dubai' or 'cultural tips for UAE'"""
+    # The data is static, so split each city's attractions into must-visit and others once
+    for city_data in knowledge_base.get('cities', {}).values():
+        attractions = city_data.get('major_attractions', [])
+        city_data['_must_visit'] = [attr for attr in attractions if attr.get('must_visit', False)]
+        city_data['_other'] = [attr for attr in attractions if not attr.get('must_visit', False)]
     
-    def __init__(self):
-        super().__init__()
-        self.knowledge_base = self._load_knowledge_base()
+    return knowledge_base
+
+
+class _KnowledgeSearch:
+    """Searches the UAE tourism knowledge base using lookups precomputed from it"""
     
-    def _load_knowledge_base(self) -> Dict[str, Any]:
-        """Load the UAE knowledge base from JSON file"""
-        try:
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            json_path = os.path.join(current_dir, 'uae_knowledge.json')
-            
-            with open(json_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            print("Warning: uae_knowledge.json not found. Using empty knowledge base.")
-            return {}
-        except json.JSONDecodeError:
-            print("Warning: Invalid JSON in uae_knowledge.json. Using empty knowledge base.")
-            return {}
+    def __init__(self):
+        self.knowledge_base = _load_kb()
+        self._index_knowledge_base()
+        self._searches = {
+            'cities': self._search_cities,
+            'culture': self._search_cultural_tips,
+            'activities': self._search_activities,
+            'transportation': self._search_transportation,
+            'food': self._search_food,
+            'weather': self._search_weather,
+        }
+        # Results depend only on the normalized query; caching the bound method keeps self out of the key
+        self._search_cached = lru_cache(maxsize=1024)(self._search)
     
-    def _run(self, query: str) -> str:
-        """Execute the search in the knowledge base"""
-        query_lower = query.lower()
-        results = []
-        
-        # Search in cities
-        if any(word in query_lower for word in ['city', 'cities', 'attractions', 'things to do', 'visit']):
-            city_results = self._search_cities(query_lower)
-            if city_results:
-                results.extend(city_results)
+    def _index_knowledge_base(self) -> None:
+        """Precompute the lookups the searches need, since the knowledge base never changes"""
+        cities = self.knowledge_base.get('cities', {})
+        # Lowercase city name -> (knowledge base order, name, data), plus one pattern finding every mention
+        self._city_lookup = {
+            city_name.lower(): (rank, city_name, city_data)
+            for rank, (city_name, city_data) in enumerate(cities.items())
+        }
+        self._city_re = _mention_pattern(self._city_lookup)
         
-        # Search for cultural tips
-        if any(word in query_lower for word in ['culture', 'cultural', 'etiquette', 'tips', 'customs']):
-            cultural_results = self._search_cultural_tips(query_lower)
-            if cultural_results:
-                results.extend(cultural_results)
+        # Pre-render the sections whose text never depends on the query
+        self._tip_lines = [(tip['category'].lower(), f"• **{tip['category']}:** {tip['tip']}\n")
+                           for tip in self.knowledge_base.get('cultural_tips', [])]
+        self._all_tips_rendered = "".join(line for _, line in self._tip_lines)
         
-        # Search for activities
-        if any(word in query_lower for word in ['activities', 'activity', 'adventure', 'luxury', 'family']):
-            activity_results = self._search_activities(query_lower)
-            if activity_results:
-                results.extend(activity_results)
+        # (category, rendered) for each activity category the knowledge base has, in its order
+        self._activity_sections = tuple(
+            (sys.intern(category), f"**{category.title()} Activities:**\n" + "".join(f"• {activity}\n" for activity in activities))
+            for category, activities in self.knowledge_base.get('activities', {}).items()
+        )
         
-        # Search for transportation
-        if any(word in query_lower for word in ['transport', 'transportation', 'metro', 'taxi', 'bus', 'travel']):
-            transport_results = self._search_transportation(query_lower)
-            if transport_results:
-                results.extend(transport_results)
+        # (query word, rendered) for each food section the knowledge base has, plus the default shown otherwise
+        food_info = self.knowledge_base.get('food', {})
+        food_sections = []
+        self._food_default = None
+        if 'traditional_dishes' in food_info:
+            dish_lines = [f"• **{dish['name']}:** {dish['description']}\n" for dish in food_info['traditional_dishes']]
+            food_sections.append(('traditional', "**Traditional UAE Dishes:**\n" + "".join(dish_lines)))
+            self._food_default = "**Traditional UAE Dishes:**\n" + "".join(dish_lines[:5])  # Limited to 5
+        if 'popular_international' in food_info:
+            food_sections.append(('international', "**Popular International Cuisines:**\n" + "".join(
+                f"• {cuisine}\n" for cuisine in food_info['popular_international'])))
+        if 'dining_etiquette' in food_info:
+            food_sections.append(('etiquette', "**Dining Etiquette:**\n" + "".join(
+                f"• {rule}\n" for rule in food_info['dining_etiquette'])))
+        self._food_sections = tuple(food_sections)
+        
+        self._transport_rendered = {
+            key: ("**General Transportation Information:**\n" if key == 'general'
+                  else f"**Transportation in {key.replace('_', ' ').title()}:**\n") + "".join(
+                f"• **{transport_type.replace('_', ' ').title()}:** {info}\n" for transport_type, info in section.items())
+            for key, section in self.knowledge_base.get('transportation', {}).items()
+        }
         
-        # Search for food information
-        if any(word in query_lower for word in ['food', 'restaurant', 'dining', 'eat', 'cuisine']):
-            food_results = self._search_food(query_lower)
-            if food_results:
-                results.extend(food_results)
+        seasons = self.knowledge_base.get('weather', {}).get('seasons')
+        self._weather_rendered = None if seasons is None else "**UAE Weather by Season:**\n" + "".join(
+            f"• **{season.title()} ({info['months']}):** {info['temperature']}, {info['description']}\n"
+            for season, info in seasons.items()
+        )
+    
+    def run(self, query: str) -> str:
+        """Execute the search in the knowledge base"""
+        return self._search_cached(query.lower().strip())
+    
+    def _search(self, query_lower: str) -> str:
+        """Run every category search matching the lowercased query"""
+        results = []
+        city_attractions_listed = False
         
-        # Search for weather information
-        if any(word in query_lower for word in ['weather', 'temperature', 'climate', 'season']):
-            weather_results = self._search_weather(query_lower)
-            if weather_results:
-                results.extend(weather_results)
+        for category in _classify_query(query_lower):
+            search = self._searches[category]
+            if category in _DEFAULTING_CATEGORIES:
+                # Once a specific city's attractions answer the query, skip these generic fallbacks
+                results.extend(search(query_lower, with_default=not city_attractions_listed))
+            else:
+                results.extend(search(query_lower))
+            
+            if category == 'cities':
+                city_attractions_listed = (self._city_re.search(query_lower) is not None
+                                           and _ATTRACTION_QUERY_RE.search(query_lower) is not None)
         
         if not results:
-            return "I couldn't find specific information about your query. Could you please be more specific or ask about UAE cities, attractions, cultural tips, activities, transportation, food, or weather?"
+            return NO_RESULTS_MESSAGE
         
         return "\n\n".join(results)
     
@@ -97,414 +197,399 @@ class UAEKnowledgeSearchTool(BaseTool):
         results = []
         cities = self.knowledge_base.get('cities', {})
         
-        # Check for specific city mentions
-        for city_name, city_data in cities.items():
-            if city_name.lower() in query:
-                result = f"**{city_name}:**\n{city_data['description']}\n"
+        # Check for specific city mentions, reported in knowledge base order
+        mentioned = {match.group(1) for match in self._city_re.finditer(query)}
+        for _, city_name, city_data in sorted(self._city_lookup[city_lower] for city_lower in mentioned):
+            parts = [f"**{city_name}:**\n{city_data['description']}\n"]
+            
+            if _ATTRACTION_QUERY_RE.search(query):
+                parts.append(f"\n**Top Attractions in {city_name}:**\n")
+                must_visit = city_data['_must_visit']
+                other_attractions = city_data['_other']
                 
-                if 'attractions' in query or 'things to do' in query or 'visit' in query:
-                    result += f"\n**Top Attractions in {city_name}:**\n"
-                    must_visit = [attr for attr in city_data['major_attractions'] if attr.get('must_visit', False)]
-                    other_attractions = [attr for attr in city_data['major_attractions'] if not attr.get('must_visit', False)]
-                    
-                    if must_visit:
-                        result += "Must-Visit:\n"
-                        for attraction in must_visit:
-                            result += f"• {attraction['name']}: {attraction['description']}\n"
-                    
-                    if other_attractions and len(must_visit) < 5:  # Show others if we have space
-                        result += "\nOther Notable Attractions:\n"
-                        for attraction in other_attractions[:3]:  # Limit to 3 additional
-                            result += f"• {attraction['name']}: {attraction['description']}\n"
+                if must_visit:
+                    parts.append("Must-Visit:\n")
+                    for attraction in must_visit:
+                        parts.append(f"• {attraction['name']}: {attraction['description']}\n")
                 
-                result += f"\n**Best Time to Visit:** {city_data['best_time_to_visit']}"
-                result += f"\n**Average Temperature:** {city_data['average_temperature']}"
-                results.append(result)
-        
+                if other_attractions and len(must_visit) < 5:  # Show others if we have space
+                    parts.append("\nOther Notable Attractions:\n")
+                    for attraction in other_attractions[:3]:  # Limit to 3 additional
+                        parts.append(f"• {attraction['name']}: {attraction['description']}\n")
+            
+            parts.append(f"\n**Best Time to Visit:** {city_data['best_time_to_visit']}")
+            parts.append(f"\n**Average Temperature:** {city_data['average_temperature']}")
+            results.append("".join(parts))
+    
         # If no specific city found, provide general overview
-        if not results and any(word in query for word in ['cities', 'emirates', 'overview']):
-            result = "**UAE Emirates Overview:**\n"
+        if not results and _OVERVIEW_QUERY_RE.search(query):
+            parts = ["**UAE Emirates Overview:**\n"]
             for city_name, city_data in cities.items():
-                result += f"• **{city_name}:** {city_data['description']}\n"
-            results.append(result)
+                parts.append(f"• **{city_name}:** {city_data['description']}\n")
+            results.append("".join(parts))
         
         return results
     
     def _search_cultural_tips(self, query: str) -> List[str]:
         """Search for cultural tips and etiquette"""
-        cultural_tips = self.knowledge_base.get('cultural_tips', [])
-        
-        if not cultural_tips:
+        if not self._tip_lines:
             return []
         
-        # Filter tips based on query
-        relevant_tips = []
-        for tip in cultural_tips:
-            if any(keyword in query for keyword in [tip['category'].lower(), 'all', 'general']):
-                relevant_tips.append(tip)
-        
-        if not relevant_tips:
-            relevant_tips = cultural_tips  # Return all if no specific match
+        # Filter tips based on query, returning all if there's no specific match
+        tips = self._all_tips_rendered
+        if 'all' not in query and 'general' not in query:
+            tips = "".join(line for category, line in self._tip_lines if category in query) or tips
         
-        result = "**Cultural Tips for Visiting UAE:**\n"
-        for tip in relevant_tips:
-            result += f"• **{tip['category']}:** {tip['tip']}\n"
-        
-        return [result]
+        return ["**Cultural Tips for Visiting UAE:**\n" + tips]
     
     def _search_activities(self, query: str) -> List[str]:
         """Search for activities and things to do"""
-        activities = self.knowledge_base.get('activities', {})
-        results = []
-        
-        for category in ['adventure', 'culture', 'luxury', 'family']:
-            if category in query or 'all' in query or 'activities' in query:
-                if category in activities:
-                    result = f"**{category.title()} Activities:**\n"
-                    for activity in activities[category]:
-                        result += f"• {activity}\n"
-                    results.append(result)
-        
-        return results
+        show_all = 'all' in query or 'activities' in query
+        return [rendered for category, rendered in self._activity_sections if show_all or category in query]
     
-    def _search_transportation(self, query: str) -> List[str]:
-        """Search for transportation information"""
-        transportation = self.knowledge_base.get('transportation', {})
-        results = []
+    def _search_transportation(self, query: str, with_default: bool = True) -> List[str]:
+        """Search for transportation information, falling back to the general section if with_default is set"""
+        transport_rendered = self._transport_rendered
         
         # Check for specific city transport
-        for city in ['dubai', 'abu_dhabi']:
-            if city in query and city in transportation:
-                result = f"**Transportation in {city.replace('_', ' ').title()}:**\n"
-                for transport_type, info in transportation[city].items():
-                    result += f"• **{transport_type.replace('_', ' ').title()}:** {info}\n"
-                results.append(result)
+        mentioned = {match.group(1) for match in _TRANSPORT_CITY_RE.finditer(query)}
+        results = [transport_rendered[city] for city in sorted(mentioned, key=_TRANSPORT_CITIES.index)
+                   if city in transport_rendered]
         
         # General transportation info
-        if 'general' in query or not results:
-            if 'general' in transportation:
-                result = "**General Transportation Information:**\n"
-                for transport_type, info in transportation['general'].items():
-                    result += f"• **{transport_type.replace('_', ' ').title()}:** {info}\n"
-                results.append(result)
+        if ('general' in query or (with_default and not results)) and 'general' in transport_rendered:
+            results.append(transport_rendered['general'])
         
         return results
     
-    def _search_food(self, query: str) -> List[str]:
-        """Search for food and dining information"""
-        food_info = self.knowledge_base.get('food', {})
-        results = []
-        
-        if 'traditional' in query and 'traditional_dishes' in food_info:
-            result = "**Traditional UAE Dishes:**\n"
-            for dish in food_info['traditional_dishes']:
-                result += f"• **{dish['name']}:** {dish['description']}\n"
-            results.append(result)
-        
-        if 'international' in query and 'popular_international' in food_info:
-            result = "**Popular International Cuisines:**\n"
-            for cuisine in food_info['popular_international']:
-                result += f"• {cuisine}\n"
-            results.append(result)
-        
-        if 'etiquette' in query and 'dining_etiquette' in food_info:
-            result = "**Dining Etiquette:**\n"
-            for rule in food_info['dining_etiquette']:
-                result += f"• {rule}\n"
-            results.append(result)
+    def _search_food(self, query: str, with_default: bool = True) -> List[str]:
+        """Search for food and dining information, falling back to traditional dishes if with_default is set"""
+        results = [rendered for word, rendered in self._food_sections if word in query]
         
         # If no specific category, show traditional dishes
-        if not results and 'traditional_dishes' in food_info:
-            result = "**Traditional UAE Dishes:**\n"
-            for dish in food_info['traditional_dishes'][:5]:  # Limit to 5
-                result += f"• **{dish['name']}:** {dish['description']}\n"
-            results.append(result)
+        if with_default and not results and self._food_default is not None:
+            results.append(self._food_default)
         
         return results
     
     def _search_weather(self, query: str) -> List[str]:
         """Search for weather information"""
-        weather_info = self.knowledge_base.get('weather', {})
-        
-        if 'seasons' in weather_info:
-            result = "**UAE Weather by Season:**\n"
-            for season, info in weather_info['seasons'].items():
-                result += f"• **{season.title()} ({info['months']}):** {info['temperature']}, {info['description']}\n"
-            return [result]
+        if self._weather_rendered is not None:
+            return [self._weather_rendered]
         
         return []
 
-    async def _arun(self, query: str) -> str:
-        """Async version of the tool"""
-        return self._run(query)
 
+@lru_cache(maxsize=1)
+def _knowledge_search() -> _KnowledgeSearch:
+    """Build the shared knowledge searcher on first use"""
+    return _KnowledgeSearch()
 
-class PrayerTimeTool(BaseTool):
-    """Tool for getting prayer times in UAE cities"""
+
+@tool("uae_knowledge_search")
+def uae_knowledge_search(query: str) -> str:
+    """Search the UAE knowledge base for information about cities, attractions, cultural tips, activities, and travel information. 
+    Use this tool when users ask about:
+    - Tourist attractions in specific UAE cities
+    - Cultural tips and etiquette
+    - Activities and things to do
+    - Transportation information
+    - Food and dining
+    - Weather information
+    - General UAE facts
     
-    name = "prayer_times"
-    description = """Get Islamic prayer times for UAE cities. 
-    Input should be in format: 'city_name' or 'city_name,date' (date in YYYY-MM-DD format).
-    Example: 'Dubai' or 'Dubai,2024-03-15'
+    Input should be a search query like 'attractions in Dubai' or 'cultural tips for UAE'"""
+    return _knowledge_search().run(query)
+
+
+# Static prayer times for UAE cities (approximate times, vary by season)
+_STATIC_PRAYER_TIMES = {
+    'dubai': {
+        'fajr': '05:30',
+        'dhuhr': '12:15', 
+        'asr': '15:45',
+        'maghrib': '18:30',
+        'isha': '20:00'
+    },
+    'abu dhabi': {
+        'fajr': '05:35',
+        'dhuhr': '12:20',
+        'asr': '15:50', 
+        'maghrib': '18:35',
+        'isha': '20:05'
+    },
+    'sharjah': {
+        'fajr': '05:28',
+        'dhuhr': '12:12',
+        'asr': '15:42',
+        'maghrib': '18:27',
+        'isha': '19:57'
+    },
+    'ajman': {
+        'fajr': '05:29',
+        'dhuhr': '12:13',
+        'asr': '15:43',
+        'maghrib': '18:28',
+        'isha': '19:58'
+    },
+    'ras al khaimah': {
+        'fajr': '05:25',
+        'dhuhr': '12:10',
+        'asr': '15:40',
+        'maghrib': '18:25',
+        'isha': '19:55'
+    },
+    'fujairah': {
+        'fajr': '05:20',
+        'dhuhr': '12:05',
+        'asr': '15:35',
+        'maghrib': '18:20',
+        'isha': '19:50'
+    },
+    'umm al quwain': {
+        'fajr': '05:27',
+        'dhuhr': '12:12',
+        'asr': '15:42',
+        'maghrib': '18:27',
+        'isha': '19:57'
+    }
+}
+
+_PRAYER_CITIES = ', '.join(_STATIC_PRAYER_TIMES.keys()).title()
+
+# Approximate coordinates of each city for the Aladhan API
+_CITY_COORDS = {
+    'dubai': (25.2048, 55.2708),
+    'abu dhabi': (24.4539, 54.3773),
+    'sharjah': (25.3463, 55.4209),
+    'ajman': (25.4052, 55.5136),
+    'ras al khaimah': (25.7896, 55.9429),
+    'fujairah': (25.1164, 56.3265),
+    'umm al quwain': (25.5641, 55.5552)
+}
+
+
+@lru_cache(maxsize=256)
+def _format_static_prayer_times(city: str, date_str: str, times_tuple: tuple) -> str:
+    """Format a city's static prayer times (cached, since the inputs repeat)"""
+    times = dict(times_tuple)
     
-    Available cities: Dubai, Abu Dhabi, Sharjah, Ajman, Ras Al Khaimah, Fujairah, Umm Al Quwain"""
+    parts = [
+        f"**Prayer Times for {city.title()} ({date_str}):**\n",
+        f"• **Fajr:** {times['fajr']}\n",
+        f"• **Dhuhr:** {times['dhuhr']}\n",
+        f"• **Asr:** {times['asr']}\n",
+        f"• **Maghrib:** {times['maghrib']}\n",
+        f"• **Isha:** {times['isha']}\n",
+        "\n*Note: Times are approximate and may vary by season. For precise times, consult local Islamic centers.*",
+    ]
     
-    def __init__(self):
-        super().__init__()
-        # Static prayer times for UAE cities (approximate times, vary by season)
-        self.static_prayer_times = {
-            'dubai': {
-                'fajr': '05:30',
-                'dhuhr': '12:15', 
-                'asr': '15:45',
-                'maghrib': '18:30',
-                'isha': '20:00'
-            },
-            'abu dhabi': {
-                'fajr': '05:35',
-                'dhuhr': '12:20',
-                'asr': '15:50', 
-                'maghrib': '18:35',
-                'isha': '20:05'
-            },
-            'sharjah': {
-                'fajr': '05:28',
-                'dhuhr': '12:12',
-                'asr': '15:42',
-                'maghrib': '18:27',
-                'isha': '19:57'
-            },
-            'ajman': {
-                'fajr': '05:29',
-                'dhuhr': '12:13',
-                'asr': '15:43',
-                'maghrib': '18:28',
-                'isha': '19:58'
-            },
-            'ras al khaimah': {
-                'fajr': '05:25',
-                'dhuhr': '12:10',
-                'asr': '15:40',
-                'maghrib': '18:25',
-                'isha': '19:55'
-            },
-            'fujairah': {
-                'fajr': '05:20',
-                'dhuhr': '12:05',
-                'asr': '15:35',
-                'maghrib': '18:20',
-                'isha': '19:50'
-            },
-            'umm al quwain': {
-                'fajr': '05:27',
-                'dhuhr': '12:12',
-                'asr': '15:42',
-                'maghrib': '18:27',
-                'isha': '19:57'
-            }
-        }
+    return "".join(parts)
+
+
+def _get_static_prayer_times(city: str, date_str: str) -> str:
+    """Get prayer times from static data"""
+    if city not in _STATIC_PRAYER_TIMES:
+        return f"Prayer times not available for '{city}'. Available cities: {_PRAYER_CITIES}"
     
-    def _run(self, query: str) -> str:
-        """Get prayer times for the specified city and date"""
-        parts = query.split(',')
-        city = parts[0].strip().lower()
-        date_str = parts[1].strip() if len(parts) > 1 else datetime.now().strftime('%Y-%m-%d')
-        
-        # Check if API is enabled
-        api_enabled = os.getenv('ALADHAN_API_ENABLED', 'false').lower() == 'true'
-        
-        if api_enabled:
-            return self._get_api_prayer_times(city, date_str)
-        else:
-            return self._get_static_prayer_times(city, date_str)
+    return _format_static_prayer_times(city, date_str, tuple(sorted(_STATIC_PRAYER_TIMES[city].items())))
+
+
+@lru_cache(maxsize=1)
+def _api_enabled() -> bool:
+    """Whether prayer times come from the Aladhan API (read once, on first use, so .env is loaded by then)"""
+    return os.getenv('ALADHAN_API_ENABLED', 'false').lower() == 'true'
+
+
+@lru_cache(maxsize=1)
+def _aladhan_session():
+    """Shared Aladhan API session so repeated lookups reuse pooled keep-alive connections"""
+    # Imported here so the default static path never pays for loading requests
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
     
-    def _get_static_prayer_times(self, city: str, date_str: str) -> str:
-        """Get prayer times from static data"""
-        if city not in self.static_prayer_times:
-            available_cities = ', '.join(self.static_prayer_times.keys()).title()
-            return f"Prayer times not available for '{city}'. Available cities: {available_cities}"
-        
-        times = self.static_prayer_times[city]
+    session = requests.Session()
+    session.mount('https://', HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=8,
+        max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+    ))
+    return session
+
+
+def _get_api_prayer_times(city: str, date_str: str) -> str:
+    """Get prayer times from Aladhan API"""
+    try:
+        if city not in _CITY_COORDS:
+            return _get_static_prayer_times(city, date_str)
+        
+        lat, lng = _CITY_COORDS[city]
+        
+        url = f"https://api.aladhan.com/v1/timings/{date_str}"
+        params = {
+            'latitude': lat,
+            'longitude': lng,
+            'method': 2  # Islamic Society of North America (ISNA) method
+        }
         
-        result = f"**Prayer Times for {city.title()} ({date_str}):**\n"
-        result += f"• **Fajr:** {times['fajr']}\n"
-        result += f"• **Dhuhr:** {times['dhuhr']}\n"  
-        result += f"• **Asr:** {times['asr']}\n"
-        result += f"• **Maghrib:** {times['maghrib']}\n"
-        result += f"• **Isha:** {times['isha']}\n"
-        result += "\n*Note: Times are approximate and may vary by season. For precise times, consult local Islamic centers.*"
+        response = _aladhan_session().get(url, params=params, headers={'Accept-Encoding': 'gzip'}, timeout=(2, 5))
         
-        return result
-    
-    def _get_api_prayer_times(self, city: str, date_str: str) -> str:
-        """Get prayer times from Aladhan API"""
-        try:
-            # Map city names to coordinates (approximate)
-            city_coords = {
-                'dubai': (25.2048, 55.2708),
-                'abu dhabi': (24.4539, 54.3773),
-                'sharjah': (25.3463, 55.4209),
-                'ajman': (25.4052, 55.5136),
-                'ras al khaimah': (25.7896, 55.9429),
-                'fujairah': (25.1164, 56.3265),
-                'umm al quwain': (25.5641, 55.5552)
-            }
+        if response.status_code == 200:
+            data = response.json()
+            timings = data['data']['timings']
             
-            if city not in city_coords:
-                return self._get_static_prayer_times(city, date_str)
+            parts = [
+                f"**Prayer Times for {city.title()} ({date_str}):**\n",
+                f"• **Fajr:** {timings['Fajr']}\n",
+                f"• **Dhuhr:** {timings['Dhuhr']}\n",
+                f"• **Asr:** {timings['Asr']}\n",
+                f"• **Maghrib:** {timings['Maghrib']}\n",
+                f"• **Isha:** {timings['Isha']}\n",
+            ]
             
-            lat, lng = city_coords[city]
-            
-            url = f"http://api.aladhan.com/v1/timings/{date_str}"
-            params = {
-                'latitude': lat,
-                'longitude': lng,
-                'method': 2  # Islamic Society of North America (ISNA) method
-            }
-            
-            response = requests.get(url, params=params, timeout=5)
+            return "".join(parts)
+        else:
+            return _get_static_prayer_times(city, date_str)
             
-            if response.status_code == 200:
-                data = response.json()
-                timings = data['data']['timings']
-                
-                result = f"**Prayer Times for {city.title()} ({date_str}):**\n"
-                result += f"• **Fajr:** {timings['Fajr']}\n"
-                result += f"• **Dhuhr:** {timings['Dhuhr']}\n"
-                result += f"• **Asr:** {timings['Asr']}\n"
-                result += f"• **Maghrib:** {timings['Maghrib']}\n"
-                result += f"• **Isha:** {timings['Isha']}\n"
-                
-                return result
-            else:
-                return self._get_static_prayer_times(city, date_str)
-                
-        except Exception as e:
-            print(f"Error fetching prayer times from API: {e}")
-            return self._get_static_prayer_times(city, date_str)
-    
-    async def _arun(self, query: str) -> str:
-        """Async version of the tool"""
-        return self._run(query)
+    except Exception as e:
+        print(f"Error fetching prayer times from API: {e}")
+        return _get_static_prayer_times(city, date_str)
 
 
-class TripBudgetPlanner(BaseTool):
-    """Tool for calculating trip budget estimates"""
-    
-    name = "trip_budget_planner"
-    description = """Calculate estimated budget for UAE trips based on city, duration, and travel style.
-    Input format: 'city,days,style' where:
-    - city: UAE city name (Dubai, Abu Dhabi, etc.)
-    - days: number of days (integer)
-    - style: budget, standard, or luxury
-    
-    Example: 'Dubai,5,standard' or 'Abu Dhabi,3,luxury'"""
-    
-    def __init__(self):
-        super().__init__()
-        # Base costs per day in AED
-        self.base_costs = {
-            'budget': 150,
-            'standard': 400, 
-            'luxury': 1000
-        }
-        
-        # City multipliers (Dubai and Abu Dhabi are more expensive)
-        self.city_multipliers = {
-            'dubai': 1.2,
-            'abu dhabi': 1.1,
-            'sharjah': 0.9,
-            'ajman': 0.8,
-            'ras al khaimah': 0.85,
-            'fujairah': 0.8,
-            'umm al quwain': 0.75
-        }
+@tool("prayer_times")
+def prayer_times(query: str) -> str:
+    """Get Islamic prayer times for UAE cities. 
+    Input should be in format: 'city_name' or 'city_name,date' (date in YYYY-MM-DD format).
+    Example: 'Dubai' or 'Dubai,2024-03-15'
     
-    def _run(self, query: str) -> str:
-        """Calculate trip budget estimate"""
-        try:
-            parts = [part.strip().lower() for part in query.split(',')]
-            
-            if len(parts) != 3:
-                return "Please provide input in format: 'city,days,style'. Example: 'Dubai,5,standard'"
-            
-            city, days_str, style = parts
-            
-            # Validate inputs
-            try:
-                days = int(days_str)
-                if days <= 0:
-                    return "Number of days must be a positive integer."
-            except ValueError:
-                return "Number of days must be a valid integer."
-            
-            if style not in self.base_costs:
-                return f"Travel style must be one of: {', '.join(self.base_costs.keys())}"
-            
-            if city not in self.city_multipliers:
-                available_cities = ', '.join([c.title() for c in self.city_multipliers.keys()])
-                return f"City not recognized. Available cities: {available_cities}"
-            
-            # Calculate budget
-            base_cost_per_day = self.base_costs[style]
-            city_multiplier = self.city_multipliers[city]
-            cost_per_day = base_cost_per_day * city_multiplier
-            total_cost = cost_per_day * days
-            
-            # Create detailed breakdown
-            result = f"**Trip Budget Estimate for {city.title()}**\n"
-            result += f"**Duration:** {days} days\n"
-            result += f"**Travel Style:** {style.title()}\n\n"
-            
-            result += f"**Daily Cost Breakdown:**\n"
-            result += f"• Base cost ({style}): {base_cost_per_day} AED/day\n"
-            result += f"• City adjustment ({city.title()}): {city_multiplier}x\n"
-            result += f"• Daily total: {cost_per_day:.0f} AED/day\n\n"
-            
-            result += f"**Total Trip Cost: {total_cost:.0f} AED**\n"
-            result += f"*Approximately ${total_cost/3.67:.0f} USD*\n\n"
-            
-            # Add style-specific inclusions
-            result += self._get_style_inclusions(style)
-            
-            result += "\n*Note: This is an estimate. Actual costs may vary based on specific choices, season, and exchange rates.*"
-            
-            return result
-            
-        except Exception as e:
-            return f"Error calculating budget: {str(e)}. Please use format: 'city,days,style'"
+    Available cities: Dubai, Abu Dhabi, Sharjah, Ajman, Ras Al Khaimah, Fujairah, Umm Al Quwain"""
+    parts = query.split(',')
+    city = parts[0].strip().lower()
+    date_str = parts[1].strip() if len(parts) > 1 else _today()
     
-    def _get_style_inclusions(self, style: str) -> str:
-        """Get what's included in each travel style"""
-        inclusions = {
-            'budget': """**Budget Travel Includes:**
+    if _api_enabled():
+        return _get_api_prayer_times(city, date_str)
+    else:
+        return _get_static_prayer_times(city, date_str)
+
+
+# Base costs per day in AED
+_BASE_COSTS = {
+    'budget': 150,
+    'standard': 400, 
+    'luxury': 1000
+}
+
+# City multipliers (Dubai and Abu Dhabi are more expensive)
+_CITY_MULTIPLIERS = {
+    'dubai': 1.2,
+    'abu dhabi': 1.1,
+    'sharjah': 0.9,
+    'ajman': 0.8,
+    'ras al khaimah': 0.85,
+    'fujairah': 0.8,
+    'umm al quwain': 0.75
+}
+
+# Display names for the budget output and its error message
+_CITY_DISPLAY_NAMES = {city: city.title() for city in _CITY_MULTIPLIERS}
+_BUDGET_CITIES_MESSAGE = f"City not recognized. Available cities: {', '.join(_CITY_DISPLAY_NAMES.values())}"
+
+# What's included in each travel style
+_STYLE_INCLUSIONS = {
+    'budget': """**Budget Travel Includes:**
 • Basic accommodation (hostels, budget hotels)
 • Local transportation (metro, bus)
 • Street food and casual dining
 • Free attractions and beaches
 • Basic shopping""",
-            
-            'standard': """**Standard Travel Includes:**
+    
+    'standard': """**Standard Travel Includes:**
 • Mid-range hotels (3-4 star)
 • Mix of public transport and taxis
 • Restaurant dining with some fine dining
 • Major paid attractions and activities
 • Moderate shopping and souvenirs""",
-            
-            'luxury': """**Luxury Travel Includes:**
+    
+    'luxury': """**Luxury Travel Includes:**
 • 5-star hotels and resorts
 • Private transportation and chauffeurs
 • Fine dining and exclusive restaurants
 • Premium attractions and VIP experiences
 • High-end shopping and spa treatments"""
-        }
-        
-        return inclusions.get(style, "")
+}
+
+_MAX_DAYS_DIGITS = 6
+
+_USD_PER_AED = 1 / 3.67
+
+_BUDGET_TEMPLATE = (
+    "**Trip Budget Estimate for {city}**\n"
+    "**Duration:** {days} days\n"
+    "**Travel Style:** {style_title}\n\n"
+    "**Daily Cost Breakdown:**\n"
+    "• Base cost ({style}): {base_cost} AED/day\n"
+    "• City adjustment ({city}): {multiplier}x\n"
+    "• Daily total: {cost_per_day:.0f} AED/day\n\n"
+    "**Total Trip Cost: {total_cost:.0f} AED**\n"
+    "*Approximately ${total_usd:.0f} USD*\n\n"
+    "{inclusions}"
+    "\n*Note: This is an estimate. Actual costs may vary based on specific choices, season, and exchange rates.*"
+)
+
+
+@tool("trip_budget_planner")
+def trip_budget_planner(query: str) -> str:
+    """Calculate estimated budget for UAE trips based on city, duration, and travel style.
+    Input format: 'city,days,style' where:
+    - city: UAE city name (Dubai, Abu Dhabi, etc.)
+    - days: number of days (integer)
+    - style: budget, standard, or luxury
+    
+    Example: 'Dubai,5,standard' or 'Abu Dhabi,3,luxury'"""
+    fields = [field.strip().lower() for field in query.split(',')]
+    
+    if len(fields) != 3:
+        return "Please provide input in format: 'city,days,style'. Example: 'Dubai,5,standard'"
+    
+    city, days_str, style = fields
+    
+    # Validate inputs with plain string checks rather than catching int() failures
+    digits = days_str[1:] if days_str[:1] in ('+', '-') else days_str
+    if not digits.isdecimal():
+        return "Number of days must be a valid integer."
+    # Also keeps int() clear of its digit limit and the cost maths clear of float overflow
+    if len(digits) > _MAX_DAYS_DIGITS:
+        return "Number of days is too large."
+    if (days := int(days_str)) <= 0:
+        return "Number of days must be a positive integer."
+    
+    if style not in _BASE_COSTS:
+        return f"Travel style must be one of: {', '.join(_BASE_COSTS.keys())}"
+    
+    if city not in _CITY_MULTIPLIERS:
+        return _BUDGET_CITIES_MESSAGE
+    
+    # Calculate budget
+    base_cost_per_day = _BASE_COSTS[style]
+    city_multiplier = _CITY_MULTIPLIERS[city]
+    cost_per_day = base_cost_per_day * city_multiplier
+    total_cost = cost_per_day * days
     
-    async def _arun(self, query: str) -> str:
-        """Async version of the tool"""
-        return self._run(query)
+    return _BUDGET_TEMPLATE.format(
+        city=_CITY_DISPLAY_NAMES[city],
+        days=days,
+        style=style,
+        style_title=style.title(),
+        base_cost=base_cost_per_day,
+        multiplier=city_multiplier,
+        cost_per_day=cost_per_day,
+        total_cost=total_cost,
+        total_usd=total_cost * _USD_PER_AED,
+        inclusions=_STYLE_INCLUSIONS[style],
+    )
 
 
 # Export all tools
-__all__ = ['UAEKnowledgeSearchTool', 'PrayerTimeTool', 'TripBudgetPlanner']
\ No newline at end of file
+__all__ = ['uae_knowledge_search', 'prayer_times', 'trip_budget_planner']
\ No newline at end of file